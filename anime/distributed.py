@@ -0,0 +1,336 @@
+import os
+import sys
+import json
+import time
+import queue
+import socket
+import struct
+import signal
+import argparse
+import threading
+import socketserver
+
+from models import DEFAULT_MODE
+from engine import WEIGHTS_DIR
+from frame_cache import file_digest
+
+DEFAULT_PORT = 9100
+CHUNK_SIZE = 16
+HEARTBEAT_INTERVAL = 30
+REPLY_TIMEOUT = 120
+CONNECT_TIMEOUT = 10
+RECONNECT_DELAY = 5
+MAX_ATTEMPTS = 3
+
+
+def parse_workers(text):
+    workers = []
+    for item in text.replace(",", " ").split():
+        # host, host:port, [ipv6]:port або голий ipv6 без порту
+        if item.startswith("["):
+            host, _, rest = item[1:].partition("]")
+            port = rest[1:] if rest.startswith(":") else ""
+        elif item.count(":") == 1:
+            host, port = item.split(":")
+        else:
+            host, port = item, ""
+        workers.append((host or "127.0.0.1", int(port) if port else DEFAULT_PORT))
+    return workers
+
+
+def recv_exact(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(min(size - len(data), 1024 * 1024))
+        if not chunk:
+            raise ConnectionError("З'єднання закрито")
+        data.extend(chunk)
+    return bytes(data)
+
+
+def send_msg(sock, header, payloads=()):
+    # [довжина заголовка][JSON заголовок][PNG кадри підряд, розміри в заголовку]
+    header = dict(header, sizes=[len(p) for p in payloads])
+    raw = json.dumps(header).encode()
+    sock.sendall(struct.pack("!I", len(raw)) + raw)
+    for p in payloads:
+        sock.sendall(p)
+
+
+def recv_msg(sock):
+    size, = struct.unpack("!I", recv_exact(sock, 4))
+    header = json.loads(recv_exact(sock, size))
+    payloads = [recv_exact(sock, n) for n in header.get("sizes", [])]
+    return header, payloads
+
+
+# |-----------worker-----------|
+class WorkerHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        while True:
+            try:
+                header, payloads = recv_msg(self.request)
+            except (ConnectionError, OSError):
+                return
+
+            if header.get("cmd") == "ping":
+                send_msg(self.request, {"status": "ok"})
+                continue
+
+            if header.get("cmd") == "info":
+                try:
+                    weights = self.server.weights_digest(header["model"])
+                except OSError as e:
+                    send_msg(self.request, {"status": "error", "error": str(e)})
+                    continue
+                send_msg(self.request, {"status": "ok", "weights": weights})
+                continue
+
+            # кожен кадр іде окремим повідомленням, щойно готовий, а поки модель
+            # рахує - heartbeat, тож таймаут координатора не залежить від розміру чанка
+            lock = threading.Lock()
+            done = threading.Event()
+            beat = threading.Thread(target=self.heartbeat, args=(lock, done), daemon=True)
+            beat.start()
+            try:
+                for name, data in zip(header["names"], self.server.process(header, payloads)):
+                    with lock:
+                        send_msg(self.request, {"status": "frame", "name": name}, [data])
+                reply = {"status": "ok"}
+            except (ConnectionError, OSError):
+                return
+            except Exception as e:
+                reply = {"status": "error", "error": str(e)}
+            finally:
+                done.set()
+                beat.join()
+            try:
+                send_msg(self.request, reply)
+            except OSError:
+                return
+
+    def heartbeat(self, lock, done):
+        while not done.wait(HEARTBEAT_INTERVAL):
+            try:
+                with lock:
+                    send_msg(self.request, {"status": "progress"})
+            except OSError:
+                return
+
+
+class WorkerServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address, echo=False):
+        super().__init__(address, WorkerHandler)
+        self.echo = echo
+        self.engine = None
+        self.digests = {}
+        if not echo:
+            from engine import Engine
+            self.engine = Engine()
+
+    def weights_digest(self, model_name):
+        if self.echo:
+            return "echo"
+        if model_name not in self.digests:
+            self.digests[model_name] = file_digest(os.path.join(WEIGHTS_DIR, model_name + ".pth"))
+        return self.digests[model_name]
+
+    def process(self, header, payloads):
+        if self.echo:
+            yield from payloads
+            return
+
+        import cv2
+        import numpy as np
+
+        # виходи віддаються по групах: при x8/x16 в пам'яті не весь чанк повних кадрів
+        imgs = [cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR) for data in payloads]
+        for out in self.engine.upscale_iter(imgs, header["model"], header.get("mode", DEFAULT_MODE),
+                                            header.get("passes", 1)):
+            ok, buf = cv2.imencode(".png", out)
+            del out
+            if not ok:
+                raise RuntimeError("Не вдалося закодувати кадр")
+            yield buf.tobytes()
+
+
+# |-----------coordinator-----------|
+class Coordinator:
+    def __init__(self, workers, chunk_size=CHUNK_SIZE, timeout=REPLY_TIMEOUT, max_attempts=MAX_ATTEMPTS, log=print):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.log = log
+
+    def weights_checksum(self, model_name):
+        # результати з різних ваг не можна змішувати ні у відео, ні в кеші
+        digests = set()
+        for host, port in self.workers:
+            try:
+                with socket.create_connection((host, port), timeout=CONNECT_TIMEOUT) as sock:
+                    send_msg(sock, {"cmd": "info", "model": model_name})
+                    header, _ = recv_msg(sock)
+            except OSError as e:
+                self.log(f"⚠️ Воркер {host}:{port} недоступний: {e}")
+                continue
+            if header.get("status") != "ok":
+                self.log(f"⚠️ Воркер {host}:{port}: {header.get('error', 'невідома помилка')}")
+                continue
+            digests.add(header["weights"])
+
+        if not digests:
+            self.log("❌ Жоден воркер не відповів")
+            return None
+        if len(digests) > 1:
+            self.log(f"❌ Воркери мають різні ваги {model_name}")
+            return None
+        return digests.pop()
+
+    def run(self, in_folder, out_folder, frames, model_name, mode=DEFAULT_MODE, passes=1,
+            progress=None, stop=lambda: False):
+        chunks = queue.Queue()
+        for i in range(0, len(frames), self.chunk_size):
+            chunks.put((frames[i:i + self.chunk_size], 0))
+        total_chunks = chunks.qsize()
+
+        state = {"done": 0, "frames": 0, "failed": False, "alive": len(self.workers)}
+        lock = threading.Lock()
+
+        def finished():
+            return state["failed"] or state["done"] == total_chunks or stop()
+
+        def worker_loop(host, port):
+            sock = None
+            connect_failures = 0
+            try:
+                while not finished():
+                    if sock is None:
+                        # помилки з'єднання не рахуються в спроби чанка: його ще ніхто не взяв
+                        try:
+                            sock = socket.create_connection((host, port), timeout=CONNECT_TIMEOUT)
+                            sock.settimeout(self.timeout)
+                        except OSError as e:
+                            connect_failures += 1
+                            if connect_failures >= self.max_attempts:
+                                self.log(f"❌ Воркер {host}:{port} недоступний, виключено: {e}")
+                                return
+                            time.sleep(RECONNECT_DELAY)
+                            continue
+                        connect_failures = 0
+
+                    try:
+                        names, attempts = chunks.get(timeout=0.5)
+                    except queue.Empty:
+                        continue
+
+                    done = 0
+                    try:
+                        payloads = []
+                        for name in names:
+                            with open(os.path.join(in_folder, name), "rb") as f:
+                                payloads.append(f.read())
+                        send_msg(sock, {"cmd": "upscale", "model": model_name, "mode": mode,
+                                        "passes": passes, "names": names}, payloads)
+                        while True:
+                            header, results = recv_msg(sock)
+                            status = header.get("status")
+                            if status == "progress":
+                                continue
+                            if status != "frame":
+                                break
+                            out_fp = os.path.join(out_folder, header["name"].replace(".png", "_out.png"))
+                            with open(out_fp + ".tmp", "wb") as f:
+                                f.write(results[0])
+                            os.replace(out_fp + ".tmp", out_fp)
+                            done += 1
+                            with lock:
+                                state["frames"] += 1
+                                if progress:
+                                    progress(state["frames"], len(frames))
+                        if status != "ok" or done != len(names):
+                            raise RuntimeError(header.get("error", "неповна відповідь"))
+                    except Exception as e:
+                        # решта чанка повертається в чергу, воркер перепідключається
+                        self.log(f"⚠️ Воркер {host}:{port}: {e}")
+                        sock.close()
+                        sock = None
+                        with lock:
+                            if done == len(names):
+                                state["done"] += 1
+                            elif attempts + 1 >= self.max_attempts:
+                                self.log(f"❌ Чанк {names[0]}..{names[-1]} не вдалося обробити за {self.max_attempts} спроб")
+                                state["failed"] = True
+                            else:
+                                chunks.put((names[done:], attempts + 1))
+                        continue
+
+                    with lock:
+                        state["done"] += 1
+            finally:
+                if sock is not None:
+                    sock.close()
+                with lock:
+                    state["alive"] -= 1
+                    if state["alive"] == 0 and state["done"] < total_chunks and not stop():
+                        self.log("❌ Не лишилось жодного живого воркера")
+                        state["failed"] = True
+
+        threads = [threading.Thread(target=worker_loop, args=w, daemon=True) for w in self.workers]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        return state["done"] == total_chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Розподілений апскейл кадрів по кількох хостах")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    worker = sub.add_parser("worker", help="Запустити воркер з теплою моделлю")
+    worker.add_argument("--host", default="0.0.0.0")
+    worker.add_argument("--port", type=int, default=DEFAULT_PORT)
+    worker.add_argument("--echo", action="store_true", help="Повертати кадри без апскейлу (перевірка протоколу)")
+
+    run = sub.add_parser("run", help="Розіслати кадри папки по воркерах")
+    run.add_argument("-i", "--input", default="frames")
+    run.add_argument("-o", "--output", default="upscaled")
+    run.add_argument("-n", "--model", required=True)
+    run.add_argument("--mode", default=DEFAULT_MODE)
+    run.add_argument("--passes", type=int, default=1)
+    run.add_argument("--workers", required=True, help="host:port, host:port ...")
+    run.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    args = parser.parse_args()
+
+    if args.command == "worker":
+        with WorkerServer((args.host, args.port), echo=args.echo) as server:
+            print(f"[✔] Воркер слухає {args.host}:{args.port}")
+            signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            finally:
+                if server.engine:
+                    for line in server.engine.throughput_report():
+                        print(line, flush=True)
+        return 0
+
+    os.makedirs(args.output, exist_ok=True)
+    frames = sorted(f for f in os.listdir(args.input) if f.endswith(".png"))
+    start = time.time()
+    coordinator = Coordinator(parse_workers(args.workers), chunk_size=args.chunk_size)
+    ok = coordinator.run(args.input, args.output, frames, args.model, args.mode, args.passes,
+                         progress=lambda done, total: print(f"Processing {done}/{total}", flush=True))
+    print(f"[i] {len(frames)} кадрів за {time.time() - start:.1f} сек")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+import os
+import time
+import tempfile
+import threading
+import subprocess
+
+output_profiles = {
+    "H.264": {
+        "suffix": "",
+        "args": ["-c:v", "libx264", "-preset", "slow", "-crf", "18"],
+        "low_memory": ["-x264-params", "rc-lookahead=10:sync-lookahead=0", "-threads", "2"],
+        "height": None,
+    },
+    "HEVC": {
+        "suffix": "_hevc",
+        "args": ["-c:v", "libx265", "-preset", "slow", "-crf", "20", "-tag:v", "hvc1"],
+        "low_memory": ["-x265-params", "rc-lookahead=10:frame-threads=1:pools=2"],
+        "height": None,
+    },
+    "AV1": {
+        "suffix": "_av1",
+        "args": ["-c:v", "libsvtav1", "-preset", "6", "-crf", "28"],
+        "low_memory": ["-svtav1-params", "lp=2"],
+        "height": None,
+    },
+    "1080p проксі": {
+        "suffix": "_1080p",
+        "args": ["-c:v", "libx264", "-preset", "fast", "-crf", "23"],
+        "low_memory": ["-x264-params", "rc-lookahead=10:sync-lookahead=0", "-threads", "2"],
+        "height": 1080,
+    },
+}
+
+DEFAULT_PROFILES = ["H.264"]
+
+# кадрів, які кожен енкодер тримає одночасно з low_memory: lookahead + потоки + референси.
+# Це нижня межа пам'яті енкодера: при x16 від 1080p (30720x17280) один профіль повної
+# роздільності займає ~18 ГБ, і смуги на вході цього не змінюють
+LOW_MEMORY_FRAMES = 24
+
+FRAGMENT_FLAGS = ["-movflags", "+frag_keyframe+empty_moov+default_base_moof", "-frag_duration", "5000000"]
+PNG_END = b"IEND\xaeB`\x82"
+
+
+def build_encode_cmd(input_args, profiles, output_name, audio_path=None, out_dir="res", fragmented=False,
+                     low_memory=False):
+    cmd = ["ffmpeg", "-y"] + input_args
+    if audio_path:
+        cmd.extend(["-i", audio_path])
+
+    # один вхід -> split на кілька гілок, кожна зі своїм масштабом і кодеком
+    labels = []
+    filters = []
+    if len(profiles) == 1 and not output_profiles[profiles[0]]["height"]:
+        labels.append("0:v")
+    else:
+        split_labels = [f"[v{i}]" for i in range(len(profiles))]
+        filters.append(f"[0:v]split={len(profiles)}" + "".join(split_labels))
+        for i, name in enumerate(profiles):
+            height = output_profiles[name]["height"]
+            if height:
+                filters.append(f"[v{i}]scale=-2:'min({height},ih)'[s{i}]")
+                labels.append(f"[s{i}]")
+            else:
+                labels.append(f"[v{i}]")
+        cmd.extend(["-filter_complex", ";".join(filters)])
+
+    output_paths = []
+    for label, name in zip(labels, profiles):
+        profile = output_profiles[name]
+        output_path = os.path.join(out_dir, f"{output_name}{profile['suffix']}.mp4")
+        cmd.extend(["-map", label])
+        cmd.extend(profile["args"])
+        if low_memory:
+            # короткий lookahead і мало потоків: інакше 8K-16K кадри в черзі енкодера займають десятки ГБ
+            cmd.extend(profile["low_memory"])
+        cmd.extend(["-pix_fmt", "yuv420p"])
+        if fragmented:
+            cmd.extend(FRAGMENT_FLAGS)
+        if audio_path:
+            cmd.extend(["-map", "1:a", "-c:a", "copy", "-shortest"])
+        else:
+            cmd.append("-an")
+        cmd.append(output_path)
+        output_paths.append(output_path)
+
+    return cmd, output_paths
+
+
+def encoder_memory(width, height, profiles):
+    # кадри yuv420p у черзі кожного енкодера плюс один кадр yuyv422 у демуксері rawvideo
+    total = width * height * 2
+    for name in profiles:
+        out_h = min(height, output_profiles[name]["height"] or height)
+        out_w = width * out_h // height
+        total += LOW_MEMORY_FRAMES * out_w * out_h * 3 // 2
+    return total
+
+
+def png_complete(path):
+    try:
+        with open(path, "rb") as f:
+            f.seek(-len(PNG_END), os.SEEK_END)
+            return f.read() == PNG_END
+    except OSError:
+        return False
+
+
+class ProgressiveEncoder:
+    def __init__(self, fps, profiles, output_name, frame_paths, audio_path=None, poll=0.2):
+        self.cmd, self.output_paths = build_encode_cmd(
+            ["-loglevel", "error", "-f", "image2pipe", "-framerate", str(fps), "-i", "-"],
+            profiles,
+            output_name,
+            audio_path,
+            fragmented=True
+        )
+        self.frame_paths = frame_paths
+        self.poll = poll
+        self.fed = 0
+        self.error = None
+        self.inference_done = threading.Event()
+        self.stopped = threading.Event()
+
+    def start(self):
+        self.stderr = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(self.cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=self.stderr)
+        self.thread = threading.Thread(target=self._feed, daemon=True)
+        self.thread.start()
+
+    def _feed(self):
+        try:
+            for path in self.frame_paths:
+                # кадр готовий, коли Real-ESRGAN дописав PNG до кінця
+                while not png_complete(path):
+                    if self.stopped.is_set():
+                        return
+                    if self.inference_done.is_set() and not png_complete(path):
+                        return
+                    time.sleep(self.poll)
+                with open(path, "rb") as f:
+                    self.process.stdin.write(f.read())
+                self.fed += 1
+        except (BrokenPipeError, OSError) as e:
+            # ffmpeg вийшов раніше (нема кодека, хибні аргументи): запам'ятовується для failed()
+            self.error = e
+        finally:
+            try:
+                self.process.stdin.close()
+            except OSError:
+                pass
+
+    def failed(self):
+        # перевіряється під час апскейлу, щоб не чекати годинами до finish()
+        return self.error is not None or self.process.poll() not in (None, 0)
+
+    def finish(self):
+        self.inference_done.set()
+        self.thread.join()
+        self.process.wait()
+        return self.process.returncode == 0 and self.fed == len(self.frame_paths)
+
+    def abort(self):
+        # спершу зупиняється ffmpeg: фідер може висіти в stdin.write на великому кадрі
+        self.stopped.set()
+        self.process.terminate()
+        self.process.wait()
+        self.thread.join()
+
+    def error_output(self):
+        self.stderr.seek(0)
+        return self.stderr.read().decode(errors="replace")
@@ -0,0 +1,333 @@
+import os
+import sys
+import time
+import argparse
+import threading
+import subprocess
+
+from models import inference_modes, DEFAULT_MODE
+from encode import output_profiles, DEFAULT_PROFILES, build_encode_cmd, encoder_memory, LOW_MEMORY_FRAMES
+
+WEIGHTS_DIR = os.path.join("Real-ESRGAN", "weights")
+BATCH_MEMORY_BYTES = 4 * 1024 ** 3
+MAX_BATCH = 16
+READ_AHEAD = 64
+STRIP_MIN_SCALE = 8
+STRIP_PAD = 10
+MIN_STRIP_ROWS = 8
+
+
+def build_network(model_name):
+    from basicsr.archs.rrdbnet_arch import RRDBNet
+    from realesrgan.archs.srvgg_arch import SRVGGNetCompact
+
+    if model_name == "RealESRGAN_x4plus":
+        return RRDBNet(num_in_ch=3, num_out_ch=3, num_feat=64, num_block=23, num_grow_ch=32, scale=4), 4
+    if model_name == "RealESRGAN_x4plus_anime_6B":
+        return RRDBNet(num_in_ch=3, num_out_ch=3, num_feat=64, num_block=6, num_grow_ch=32, scale=4), 4
+    if model_name == "RealESRGAN_x2plus":
+        return RRDBNet(num_in_ch=3, num_out_ch=3, num_feat=64, num_block=23, num_grow_ch=32, scale=2), 2
+    if model_name == "realesr-animevideov3":
+        return SRVGGNetCompact(num_in_ch=3, num_out_ch=3, num_feat=64, num_conv=16, upscale=4, act_type="prelu"), 4
+    raise ValueError(f"Невідома модель: {model_name}")
+
+
+def bgr_to_yuyv(strip):
+    import numpy as np
+
+    # BT.709, обмежений діапазон; хрома усереднюється по парах пікселів
+    b = strip[..., 0].astype(np.float32)
+    g = strip[..., 1].astype(np.float32)
+    r = strip[..., 2].astype(np.float32)
+    y = 16 + 0.1826 * r + 0.6142 * g + 0.0620 * b
+    u = 128 - 0.1006 * r - 0.3386 * g + 0.4392 * b
+    v = 128 + 0.4392 * r - 0.3989 * g - 0.0403 * b
+    u = (u[:, 0::2] + u[:, 1::2]) * 0.5
+    v = (v[:, 0::2] + v[:, 1::2]) * 0.5
+
+    h, w = y.shape
+    out = np.empty((h, w * 2), dtype=np.uint8)
+    out[:, 0::4] = np.clip(np.rint(y[:, 0::2]), 0, 255)
+    out[:, 1::4] = np.clip(np.rint(u), 0, 255)
+    out[:, 2::4] = np.clip(np.rint(y[:, 1::2]), 0, 255)
+    out[:, 3::4] = np.clip(np.rint(v), 0, 255)
+    return out
+
+
+def mode_options(mode):
+    args = inference_modes[mode]
+    tile = int(args[args.index("--tile") + 1]) if "--tile" in args else 0
+    tile_pad = int(args[args.index("--tile_pad") + 1]) if "--tile_pad" in args else 10
+    return tile, tile_pad, "--fp32" not in args
+
+
+class Engine:
+    def __init__(self, memory_budget=BATCH_MEMORY_BYTES):
+        self.upsamplers = {}
+        self.lock = threading.Lock()
+        self.memory_budget = memory_budget
+        self.batch_limit = MAX_BATCH
+        self.stats = {}
+
+    def get(self, model_name, mode=DEFAULT_MODE):
+        # модель вантажиться один раз і лишається "теплою" між викликами
+        if (model_name, mode) not in self.upsamplers:
+            from realesrgan import RealESRGANer
+
+            model, netscale = build_network(model_name)
+            tile, tile_pad, half = mode_options(mode)
+            upsampler = RealESRGANer(
+                scale=netscale,
+                model_path=os.path.join(WEIGHTS_DIR, model_name + ".pth"),
+                model=model,
+                tile=tile,
+                tile_pad=tile_pad,
+                pre_pad=0,
+                half=half
+            )
+            self.upsamplers[(model_name, mode)] = (upsampler, netscale)
+        return self.upsamplers[(model_name, mode)]
+
+    def upscale(self, img, model_name, mode=DEFAULT_MODE, passes=1):
+        return self.upscale_batch([img], model_name, mode, passes, batch_size=1)[0]
+
+    def frame_cost(self, upsampler, netscale, h, w):
+        # грубо: активації з 64 каналами на вихідній роздільності (RRDBNet)
+        # або на вхідній (SRVGGNetCompact), помножені на розмір елемента
+        element = 2 if upsampler.half else 4
+        if type(upsampler.model).__name__ == "SRVGGNetCompact":
+            return h * w * 64 * element * 4
+        return h * w * netscale ** 2 * 64 * element * 2
+
+    def batch_size_for(self, upsampler, netscale, shape):
+        cost = self.frame_cost(upsampler, netscale, shape[0], shape[1])
+        return max(1, min(self.batch_limit, self.memory_budget // cost))
+
+    def strip_rows_for(self, upsampler, netscale, width):
+        cost = self.frame_cost(upsampler, netscale, 1, width)
+        return max(MIN_STRIP_ROWS, self.memory_budget // cost - 2 * STRIP_PAD)
+
+    def upscale_strips(self, img, model_name, mode=DEFAULT_MODE, strip_rows=0):
+        with self.lock:
+            upsampler, netscale = self.get(model_name, mode)
+            tile = mode_options(mode)[0]
+            h, w = img.shape[:2]
+            # у тайловому режимі смуга - один ряд тайлів, і рахується вона тайлами того ж розміру
+            strip_rows = strip_rows or tile or self.strip_rows_for(upsampler, netscale, w)
+            for top in range(0, h, strip_rows):
+                # смуга з перекриттям STRIP_PAD рядків, щоб не було швів на стиках
+                bottom = min(h, top + strip_rows)
+                pad_top, pad_bottom = max(0, top - STRIP_PAD), min(h, bottom + STRIP_PAD)
+                if tile:
+                    out = upsampler.enhance(img[pad_top:pad_bottom], outscale=netscale)[0]
+                else:
+                    out = self.forward_batch(upsampler, netscale, [img[pad_top:pad_bottom]])[0]
+                yield out[(top - pad_top) * netscale:(bottom - pad_top) * netscale]
+
+    def forward_batch(self, upsampler, netscale, imgs):
+        import numpy as np
+        import torch
+        import torch.nn.functional as F
+
+        h, w = imgs[0].shape[:2]
+        batch = np.stack(imgs)[..., ::-1].transpose(0, 3, 1, 2).astype(np.float32) / 255.0
+        tensor = torch.from_numpy(np.ascontiguousarray(batch)).to(upsampler.device)
+        if upsampler.half:
+            tensor = tensor.half()
+
+        mod = 2 if netscale == 2 else 1
+        pad_h, pad_w = (mod - h % mod) % mod, (mod - w % mod) % mod
+        if pad_h or pad_w:
+            tensor = F.pad(tensor, (0, pad_w, 0, pad_h), "reflect")
+
+        with torch.no_grad():
+            out = upsampler.model(tensor)
+        out = out[:, :, :h * netscale, :w * netscale].float().clamp_(0, 1).cpu().numpy()
+        out = out.transpose(0, 2, 3, 1)[..., ::-1]
+        return [(o * 255.0).round().astype(np.uint8) for o in out]
+
+    def forward_group(self, upsampler, netscale, imgs):
+        out = []
+        i = 0
+        while i < len(imgs):
+            group = imgs[i:i + self.batch_limit]
+            start = time.time()
+            try:
+                out.extend(self.forward_batch(upsampler, netscale, group))
+            except RuntimeError as e:
+                if "out of memory" not in str(e) or len(group) == 1:
+                    raise
+                import torch
+                torch.cuda.empty_cache()
+                self.batch_limit = max(1, len(group) // 2)
+                continue
+            self.record(len(group), time.time() - start)
+            i += len(group)
+        return out
+
+    def upscale_iter(self, imgs, model_name, mode=DEFAULT_MODE, passes=1, batch_size=0):
+        # група кадрів проходить усі проходи і віддається одразу:
+        # у пам'яті лише виходи однієї групи, а не всього списку
+        with self.lock:
+            upsampler, netscale = self.get(model_name, mode)
+            tiled = mode_options(mode)[0] > 0
+            i = 0
+            while i < len(imgs):
+                shape = imgs[i].shape
+                if tiled:
+                    size = 1
+                else:
+                    # розмір групи за останнім проходом, найдорожчим за пам'яттю
+                    grow = netscale ** (passes - 1)
+                    last = (shape[0] * grow, shape[1] * grow)
+                    size = min(batch_size or self.batch_size_for(upsampler, netscale, last), self.batch_limit)
+                group = []
+                while i + len(group) < len(imgs) and len(group) < size and imgs[i + len(group)].shape == shape:
+                    group.append(imgs[i + len(group)])
+                i += len(group)
+
+                for _ in range(passes):
+                    if tiled:
+                        group = [upsampler.enhance(img, outscale=netscale)[0] for img in group]
+                    else:
+                        group = self.forward_group(upsampler, netscale, group)
+                yield from group
+
+    def upscale_batch(self, imgs, model_name, mode=DEFAULT_MODE, passes=1, batch_size=0):
+        return list(self.upscale_iter(imgs, model_name, mode, passes, batch_size))
+
+    def benchmark(self, imgs, model_name, mode=DEFAULT_MODE):
+        with self.lock:
+            upsampler, netscale = self.get(model_name, mode)
+            top = self.batch_size_for(upsampler, netscale, imgs[0].shape)
+            sizes = [1 << n for n in range(top.bit_length()) if 1 << n <= top]
+            if sizes[-1] != top:
+                sizes.append(top)
+
+            # кожен розмір батчу обробляє однакову кількість кадрів
+            results = []
+            for size in sizes:
+                group = (imgs * size)[:size]
+                rounds = max(1, top // size)
+                try:
+                    self.forward_batch(upsampler, netscale, group)
+                    start = time.time()
+                    for _ in range(rounds):
+                        self.forward_batch(upsampler, netscale, group)
+                    elapsed = time.time() - start
+                except RuntimeError as e:
+                    if "out of memory" not in str(e):
+                        raise
+                    break
+                results.append((size, rounds * size / elapsed if elapsed > 0 else 0))
+        return results
+
+    def record(self, batch, elapsed):
+        frames, seconds = self.stats.get(batch, (0, 0.0))
+        self.stats[batch] = (frames + batch, seconds + elapsed)
+
+    def throughput_report(self):
+        lines = []
+        for batch, (frames, seconds) in sorted(self.stats.items()):
+            fps = frames / seconds if seconds > 0 else 0
+            lines.append(f"[i] Батч {batch}: {fps:.2f} кадр/сек ({frames} кадрів)")
+        return lines
+
+
+def stream_strips(engine, frames, args):
+    import cv2
+
+    h, w = cv2.imread(os.path.join(args.input, frames[0]), cv2.IMREAD_COLOR).shape[:2]
+    netscale = engine.get(args.model, args.mode)[1]
+    out_w, out_h = w * netscale, h * netscale
+    cmd, _ = build_encode_cmd(
+        ["-loglevel", "error", "-f", "rawvideo", "-pix_fmt", "yuyv422",
+         "-color_range", "tv", "-colorspace", "bt709",
+         "-s", f"{out_w}x{out_h}", "-framerate", str(args.fps), "-i", "-"],
+        args.profiles,
+        args.output_name,
+        args.audio,
+        fragmented=args.fragmented,
+        low_memory=True
+    )
+    # смуги прибирають повний кадр лише з апскейлу; енкодер усе одно тримає повні кадри
+    need = encoder_memory(out_w, out_h, args.profiles)
+    print(f"[i] Енкодер {out_w}x{out_h}: ~{LOW_MEMORY_FRAMES} кадрів на профіль, "
+          f"~{need / 1024 ** 3:.1f} ГБ RAM", flush=True)
+    if hasattr(os, "sysconf") and "SC_PHYS_PAGES" in os.sysconf_names:
+        ram = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+        if need > ram:
+            print(f"⚠️ Енкодеру потрібно більше, ніж є RAM ({ram / 1024 ** 3:.1f} ГБ): "
+                  f"оберіть менший масштаб або менше профілів", flush=True)
+
+    # повний кадр фінальної роздільності ніколи не існує в пам'яті
+    process = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+    try:
+        for done, name in enumerate(frames, 1):
+            img = cv2.imread(os.path.join(args.input, name), cv2.IMREAD_COLOR)
+            for strip in engine.upscale_strips(img, args.model, args.mode, args.strip_rows):
+                process.stdin.write(bgr_to_yuyv(strip))
+            print(f"Processing {done}/{len(frames)} {name}", flush=True)
+    finally:
+        process.stdin.close()
+        process.wait()
+    return 0 if process.returncode == 0 else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Апскейл папки кадрів з батчингом кількох кадрів")
+    parser.add_argument("-i", "--input", required=True)
+    parser.add_argument("-o", "--output", default="upscaled")
+    parser.add_argument("-n", "--model", required=True)
+    parser.add_argument("--mode", default=DEFAULT_MODE, choices=inference_modes.keys())
+    parser.add_argument("--passes", type=int, default=1)
+    parser.add_argument("--batch", type=int, default=0, help="Розмір батчу (0 - автоматично)")
+    parser.add_argument("--memory-budget", type=int, default=BATCH_MEMORY_BYTES // 1024 ** 2, help="МБ")
+    parser.add_argument("--suffix", default="out")
+    parser.add_argument("--benchmark", action="store_true", help="Заміряти кадр/сек для батчів 1, 2, 4... і вийти")
+    parser.add_argument("--strips", action="store_true", help="Останній прохід смугами одразу в енкодер")
+    parser.add_argument("--strip-rows", type=int, default=0, help="Рядків входу на смугу (0 - автоматично)")
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--output-name")
+    parser.add_argument("--profiles", nargs="+", default=DEFAULT_PROFILES, choices=output_profiles.keys())
+    parser.add_argument("--audio")
+    parser.add_argument("--fragmented", action="store_true")
+    args = parser.parse_args()
+
+    import cv2
+
+    frames = sorted(f for f in os.listdir(args.input) if f.endswith(".png"))
+    engine = Engine(args.memory_budget * 1024 ** 2)
+    if args.strips:
+        return stream_strips(engine, frames, args)
+    if args.benchmark:
+        imgs = [cv2.imread(os.path.join(args.input, f), cv2.IMREAD_COLOR) for f in frames[:MAX_BATCH]]
+        imgs = [img for img in imgs if img.shape == imgs[0].shape]
+        results = engine.benchmark(imgs, args.model, args.mode)
+        base_fps = results[0][1]
+        for batch, fps in results:
+            speedup = fps / base_fps if base_fps > 0 else 0
+            print(f"[i] Батч {batch}: {fps:.2f} кадр/сек, x{speedup:.2f} відносно батчу 1", flush=True)
+        return 0
+
+    os.makedirs(args.output, exist_ok=True)
+
+    done = 0
+    for start in range(0, len(frames), READ_AHEAD):
+        # наперед читаються лише вхідні кадри; виходи пишуться, щойно готова їхня група
+        names = frames[start:start + READ_AHEAD]
+        imgs = [cv2.imread(os.path.join(args.input, f), cv2.IMREAD_COLOR) for f in names]
+        outs = engine.upscale_iter(imgs, args.model, args.mode, args.passes, args.batch)
+        for name, out in zip(names, outs):
+            stem = os.path.splitext(name)[0]
+            cv2.imwrite(os.path.join(args.output, f"{stem}_{args.suffix}.png"), out)
+            done += 1
+            print(f"Processing {done}/{len(frames)} {name}", flush=True)
+
+    for line in engine.throughput_report():
+        print(line, flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+import os
+import shutil
+import hashlib
+
+CACHE_DIR = "cache"
+CACHE_MAX_BYTES = 20 * 1024 ** 3
+
+
+def file_digest(path, h=None):
+    h = h or hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class FrameCache:
+    def __init__(self, model_path, scale, backend, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+        # ключ кадру = хеш кадру + модель, контрольна сума ваг, масштаб і бекенд
+        weights_sum = file_digest(model_path)
+        self.prefix = "|".join([os.path.basename(model_path), weights_sum, scale, backend]).encode()
+
+    def key(self, frame_path):
+        h = hashlib.sha256(self.prefix)
+        return file_digest(frame_path, h)
+
+    def path_for(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ".png")
+
+    def lookup(self, key):
+        path = self.path_for(key)
+        if not os.path.isfile(path):
+            return None
+        os.utime(path)
+        return path
+
+    def store(self, key, src):
+        dst = self.path_for(key)
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        tmp = dst + ".tmp"
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, dst)
+
+    def evict(self):
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for f in files:
+                fp = os.path.join(root, f)
+                st = os.stat(fp)
+                entries.append((st.st_mtime, st.st_size, fp))
+                total += st.st_size
+
+        # LRU: найдавніше використані кадри видаляються першими
+        entries.sort()
+        removed = 0
+        for _, size, fp in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(fp)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed, total
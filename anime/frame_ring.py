@@ -0,0 +1,82 @@
+import math
+import queue
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+
+PARENT_POLL = 1.0
+
+
+def attach_shm(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+class FrameRing:
+    def __init__(self, ctx, slots, shape, dtype=np.uint8):
+        self.slots = slots
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.slot_bytes = math.prod(self.shape) * self.dtype.itemsize
+        self.shm = shared_memory.SharedMemory(create=True, size=self.slot_bytes * slots)
+        self.owner = True
+
+        # по черзі ходять лише індекси слотів, самі кадри лишаються в shared memory
+        self.free = ctx.Queue()
+        self.filled = ctx.Queue()
+        for slot in range(slots):
+            self.free.put(slot)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["shm"] = self.shm.name
+        state["owner"] = False
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.shm = attach_shm(state["shm"])
+
+    def view(self, slot):
+        offset = slot * self.slot_bytes
+        return np.ndarray(self.shape, dtype=self.dtype, buffer=self.shm.buf, offset=offset)
+
+    def wait(self, q):
+        # батьківський процес може зникнути без сигналу (TerminateProcess на Windows),
+        # тоді дочірній не повинен висіти на черзі вічно
+        parent = multiprocessing.parent_process()
+        while True:
+            if parent is not None and not parent.is_alive():
+                raise SystemExit(1)
+            try:
+                return q.get(timeout=PARENT_POLL)
+            except queue.Empty:
+                pass
+
+    def acquire(self):
+        # блокується, поки кільце заповнене: природний backpressure
+        return self.wait(self.free)
+
+    def publish(self, slot, index):
+        self.filled.put((index, slot))
+
+    def next(self):
+        return self.wait(self.filled)
+
+    def release(self, slot):
+        self.free.put(slot)
+
+    def finish(self, readers=1):
+        for _ in range(readers):
+            self.filled.put(None)
+
+    def close(self):
+        try:
+            self.shm.close()
+        except BufferError:
+            pass
+        if self.owner:
+            self.shm.unlink()
@@ -0,0 +1,42 @@
+model_categories = {
+    "🟢 Універсальні": {
+        "RealESRGAN_x2plus": {
+            "2x": "RealESRGAN_x2plus.pth",
+            "8x": "RealESRGAN_x2plus.pth",
+            "16x": "RealESRGAN_x2plus.pth",
+        },
+        "RealESRGAN_x4plus": {
+            "4x": "RealESRGAN_x4plus.pth",
+            "8x": "RealESRGAN_x4plus.pth",
+            "16x": "RealESRGAN_x4plus.pth",
+        },
+    },
+    "🟣 Аніме / 2D": {
+        "RealESRGAN_x4plus_anime_6B": {
+            "4x": "RealESRGAN_x4plus_anime_6B.pth",
+            "8x": "RealESRGAN_x4plus_anime_6B.pth",
+            "16x": "RealESRGAN_x4plus_anime_6B.pth",
+        },
+        "realesr-animevideov3": {
+            "4x": "realesr-animevideov3.pth",
+            "8x": "realesr-animevideov3.pth",
+            "16x": "realesr-animevideov3.pth",
+        },
+    },
+}
+
+inference_modes = {
+    "fp32": ["--tile", "0", "--fp32"],
+    "fp16": ["--tile", "0"],
+    "tile256": ["--tile", "256", "--tile_pad", "10"],
+    "tile128": ["--tile", "128", "--tile_pad", "10"],
+}
+
+REFERENCE_MODE = "fp32"
+DEFAULT_MODE = "fp16"
+
+
+def base_model_file(category, model_name):
+    scales = model_categories[category][model_name]
+    base = min(scales.keys(), key=lambda s: int(s.replace("x", "")))
+    return scales[base]
@@ -0,0 +1,190 @@
+import sys
+import signal
+import argparse
+import subprocess
+import multiprocessing
+
+from models import inference_modes, DEFAULT_MODE
+from encode import output_profiles, DEFAULT_PROFILES, build_encode_cmd
+from frame_ring import FrameRing
+
+IN_SLOTS = 8
+INFER_WORKERS = 2
+
+
+def read_into(stream, view):
+    buf = memoryview(view).cast("B")
+    filled = 0
+    while filled < len(buf):
+        n = stream.readinto(buf[filled:])
+        if not n:
+            break
+        filled += n
+    buf.release()
+    return filled
+
+
+# |-----------decode-----------|
+def decode_proc(video_path, in_ring, workers):
+    cmd = ["ffmpeg", "-loglevel", "error", "-i", video_path, "-vsync", "vfr",
+           "-f", "rawvideo", "-pix_fmt", "bgr24", "-"]
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE)
+    index = 0
+    truncated = False
+    try:
+        while True:
+            slot = in_ring.acquire()
+            view = in_ring.view(slot)
+            n = read_into(process.stdout, view)
+            del view
+            if n < in_ring.slot_bytes:
+                # 0 байт - кінець потоку, неповний кадр - збій декодера
+                in_ring.release(slot)
+                truncated = n > 0
+                break
+            in_ring.publish(slot, index)
+            index += 1
+    finally:
+        in_ring.finish(workers)
+        # закритий pipe зупиняє ffmpeg, якщо вихід стався посеред потоку
+        process.stdout.close()
+        process.wait()
+        in_ring.close()
+
+    if truncated or process.returncode != 0:
+        print(f"❌ Декодер зупинився на кадрі {index} (код {process.returncode})", flush=True)
+        sys.exit(1)
+
+
+# |-----------infer-----------|
+def infer_proc(in_ring, out_ring, model_name, mode, passes):
+    from engine import Engine
+
+    engine = Engine()
+    try:
+        while True:
+            # вихідний слот береться ДО вхідного кадру, інакше енкодер може чекати
+            # кадр, для якого вже не лишилось вільного слота
+            out_slot = out_ring.acquire()
+            msg = in_ring.next()
+            if msg is None:
+                out_ring.release(out_slot)
+                break
+
+            index, in_slot = msg
+            src = in_ring.view(in_slot)
+            result = engine.upscale(src, model_name, mode, passes)
+            del src
+            in_ring.release(in_slot)
+
+            dst = out_ring.view(out_slot)
+            dst[...] = result
+            del dst
+            out_ring.publish(out_slot, index)
+    finally:
+        out_ring.finish()
+        in_ring.close()
+        out_ring.close()
+
+
+# |-----------encode-----------|
+def encode_proc(out_ring, workers, cmd, total):
+    process = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+    pending = {}
+    expected = 0
+    finished = 0
+    try:
+        while finished < workers:
+            msg = out_ring.next()
+            if msg is None:
+                finished += 1
+                continue
+
+            index, slot = msg
+            pending[index] = slot
+            while expected in pending:
+                slot = pending.pop(expected)
+                view = out_ring.view(slot)
+                process.stdin.write(memoryview(view).cast("B"))
+                del view
+                out_ring.release(slot)
+                expected += 1
+                print(f"Processing {expected}/{total}", flush=True)
+    finally:
+        process.stdin.close()
+        process.wait()
+        out_ring.close()
+    sys.exit(0 if process.returncode == 0 and not pending else 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Потоковий апскейл: декодер, воркери і енкодер у окремих процесах")
+    parser.add_argument("-i", "--input", required=True)
+    parser.add_argument("-n", "--model", required=True)
+    parser.add_argument("--mode", default=DEFAULT_MODE, choices=inference_modes.keys())
+    parser.add_argument("--passes", type=int, default=1)
+    parser.add_argument("--scale", type=int, required=True, help="Підсумковий масштаб")
+    parser.add_argument("--width", type=int, required=True)
+    parser.add_argument("--height", type=int, required=True)
+    parser.add_argument("--fps", type=float, required=True)
+    parser.add_argument("--frames", type=int, default=0)
+    parser.add_argument("--output-name", required=True)
+    parser.add_argument("--profiles", nargs="+", default=DEFAULT_PROFILES, choices=output_profiles.keys())
+    parser.add_argument("--audio")
+    parser.add_argument("--fragmented", action="store_true")
+    parser.add_argument("--workers", type=int, default=INFER_WORKERS)
+    parser.add_argument("--slots", type=int, default=IN_SLOTS)
+    args = parser.parse_args()
+
+    out_w, out_h = args.width * args.scale, args.height * args.scale
+    cmd, output_paths = build_encode_cmd(
+        ["-loglevel", "error", "-f", "rawvideo", "-pix_fmt", "bgr24",
+         "-s", f"{out_w}x{out_h}", "-framerate", str(args.fps), "-i", "-"],
+        args.profiles,
+        args.output_name,
+        args.audio,
+        fragmented=args.fragmented
+    )
+
+    ctx = multiprocessing.get_context("spawn")
+    in_ring = FrameRing(ctx, args.slots, (args.height, args.width, 3))
+    out_ring = FrameRing(ctx, args.workers + 1, (out_h, out_w, 3))
+
+    procs = [ctx.Process(target=decode_proc, args=(args.input, in_ring, args.workers), daemon=True)]
+    for _ in range(args.workers):
+        procs.append(ctx.Process(target=infer_proc, args=(in_ring, out_ring, args.model, args.mode, args.passes),
+                                 daemon=True))
+    encoder = ctx.Process(target=encode_proc, args=(out_ring, args.workers, cmd, args.frames), daemon=True)
+    procs.append(encoder)
+
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(1))
+    try:
+        for p in procs:
+            p.start()
+        while encoder.is_alive():
+            encoder.join(1)
+            if any(p.exitcode not in (None, 0) for p in procs):
+                break
+    finally:
+        for p in procs:
+            # після чистого виходу енкодера решта процесів лише закривається
+            p.join(10 if encoder.exitcode == 0 else 0)
+            if p.is_alive():
+                p.terminate()
+            p.join()
+        in_ring.close()
+        out_ring.close()
+
+    # енкодер може завершитись чисто на обрізаному потоці, тож перевіряються всі процеси
+    ok = all(p.exitcode == 0 for p in procs)
+    if not ok:
+        print("❌ Один з процесів конвеєра впав", flush=True)
+        return 1
+
+    for path in output_paths:
+        print(f"[✔] {path}", flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
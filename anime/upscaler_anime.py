@@ -5,39 +5,18 @@ import subprocess
 import re
 import time
 import json
+import shutil
 from PySide6.QtWidgets import (
     QApplication, QWidget, QLabel, QPushButton, QFileDialog,
     QVBoxLayout, QHBoxLayout, QGridLayout, QLineEdit, QTextEdit,
     QMessageBox, QGroupBox
 )
 from PySide6.QtCore import Qt, QThread, Signal
-
-model_categories = {
-    "🟢 Універсальні": {
-        "RealESRGAN_x2plus": {
-            "2x": "RealESRGAN_x2plus.pth",
-            "8x": "RealESRGAN_x2plus.pth",
-            "16x": "RealESRGAN_x2plus.pth",
-        },
-        "RealESRGAN_x4plus": {
-            "4x": "RealESRGAN_x4plus.pth",
-            "8x": "RealESRGAN_x4plus.pth",
-            "16x": "RealESRGAN_x4plus.pth",
-        },
-    },
-    "🟣 Аніме / 2D": {
-        "RealESRGAN_x4plus_anime_6B": {
-            "4x": "RealESRGAN_x4plus_anime_6B.pth",
-            "8x": "RealESRGAN_x4plus_anime_6B.pth",
-            "16x": "RealESRGAN_x4plus_anime_6B.pth",
-        },
-        "realesr-animevideov3": {
-            "4x": "realesr-animevideov3.pth",
-            "8x": "realesr-animevideov3.pth",
-            "16x": "realesr-animevideov3.pth",
-        },
-    },
-}
+from models import model_categories, inference_modes, DEFAULT_MODE
+from frame_cache import FrameCache
+from engine import STRIP_MIN_SCALE
+from distributed import Coordinator, parse_workers
+from encode import output_profiles, DEFAULT_PROFILES, build_encode_cmd, ProgressiveEncoder
 
 
 class UpscaleThread(QThread):
@@ -45,13 +24,19 @@ class UpscaleThread(QThread):
     progress_signal = Signal(int, int)  
     done_signal = Signal(bool)
 
-    def __init__(self, video_path, output_name, category, model_name, scale):
+    def __init__(self, video_path, output_name, category, model_name, scale, profiles=None, mode=DEFAULT_MODE, progressive=False, workers=None, batch=False, streaming=False):
         super().__init__()
         self.video_path = video_path
         self.output_name = output_name
         self.category = category
         self.model_name = model_name
         self.scale = scale
+        self.profiles = profiles or DEFAULT_PROFILES
+        self.mode = mode
+        self.progressive = progressive
+        self.workers = workers or []
+        self.batch = batch
+        self.streaming = streaming
         self.stop_requested = False
 
     def log(self, msg):
@@ -60,8 +45,96 @@ class UpscaleThread(QThread):
     def request_stop(self):
         self.stop_requested = True
 
+    def run_logged(self, cmd, abort=None):
+        process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+            universal_newlines=True
+        )
+        progress_pattern = re.compile(r'Processing.*?(\d+)/(\d+)')
+        start_time = time.time()
+        last_eta = start_time
+        while True:
+            if self.stop_requested:
+                process.terminate()
+                process.wait()
+                self.log("[!] Операція перервана користувачем")
+                return False
+            if abort and abort():
+                process.terminate()
+                process.wait()
+                return False
+
+            line = process.stdout.readline()
+            if not line:
+                break
+
+            line = line.strip()
+            match = progress_pattern.search(line)
+            if not match:
+                self.log(line)
+                continue
+
+            processed, total = int(match.group(1)), int(match.group(2))
+            self.progress_signal.emit(processed, total)
+            now = time.time()
+            if now - last_eta >= 10 and processed > 0:
+                last_eta = now
+                fps = processed / (now - start_time)
+                remaining = (total - processed) / fps if fps > 0 else 0
+                mins, secs = divmod(int(remaining), 60)
+                self.log(f"[i] Прогрес: {processed}/{total} (~{fps:.1f} кадр/сек) Залишилось: {mins}хв {secs}с")
+
+        process.wait()
+        if process.returncode != 0:
+            self.log(f"❌ Процес завершився з кодом {process.returncode}")
+        return process.returncode == 0
+
+    def finish_job(self, output_paths, has_audio, audio_path):
+        if has_audio and os.path.exists(audio_path):
+            try:
+                os.remove(audio_path)
+                self.log("[i] Тимчасовий аудіо файл видалено")
+            except Exception as e:
+                self.log(f"⚠️ Не вдалося видалити тимчасовий аудіо файл: {str(e)}")
+
+    
+        self.log("[i] Очистка тимчасових файлів...")
+        for folder in ["frames", "upscaled"]:
+            for f in os.listdir(folder):
+                if self.stop_requested:
+                    break
+                fp = os.path.join(folder, f)
+                if os.path.isfile(fp):
+                    try:
+                        os.remove(fp)
+                    except:
+                        pass
+
+        for output_path in output_paths:
+            self.log(f"[✔] Готово! Відео збережено як: {output_path}")
+        if has_audio:
+            self.log("[i] Відео містить оригінальний звук")
+        else:
+            self.log("[i] Відео без звуку (оригінал не містив аудіо)")
+
+        self.done_signal.emit(True)
+
     def run(self):
+        encoder = None
         try:
+            if self.streaming and int(self.scale.replace("x", "")) >= STRIP_MIN_SCALE:
+                # при x8/x16 кільце тримало б workers+1 повних кадрів у shared memory
+                self.log(f"[i] Потоковий конвеєр недоступний для {self.scale}, використовується смугова збірка")
+                self.streaming = False
+            if self.streaming and self.workers:
+                # конвеєр рахує лише на локальній машині
+                self.log("[i] Потоковий конвеєр не працює з воркерами, використовується розподілений апскейл")
+                self.streaming = False
+
             self.log("[✔] Підготовка директорій...")
             os.makedirs("frames", exist_ok=True)
             os.makedirs("upscaled", exist_ok=True)
@@ -77,6 +150,9 @@ class UpscaleThread(QThread):
                     fp = os.path.join(folder, f)
                     if os.path.isfile(fp):
                         os.remove(fp)
+            for d in os.listdir("."):
+                if d.startswith("pass_") and os.path.isdir(d):
+                    shutil.rmtree(d, ignore_errors=True)
 
             if not os.path.isfile(self.video_path):
                 self.log(f"❌ Відео не знайдено: {self.video_path}")
@@ -180,25 +256,26 @@ class UpscaleThread(QThread):
                 self.log("[i] Аудіо доріжка не знайдена")
 
             
-            self.log("[✔] Витяг кадрів з відео...")
-            ffmpeg_cmd = [
-                "ffmpeg", "-y", "-i", self.video_path,
-                "-vsync", "vfr",
-                "frames/frame_%05d.png"
-            ]
-            result = subprocess.run(ffmpeg_cmd, capture_output=True, text=True)
-            if result.returncode != 0:
-                self.log(f"❌ Помилка витягування кадрів:\n{result.stderr}")
-                self.done_signal.emit(False)
-                return
+            if not self.streaming:
+                self.log("[✔] Витяг кадрів з відео...")
+                ffmpeg_cmd = [
+                    "ffmpeg", "-y", "-i", self.video_path,
+                    "-vsync", "vfr",
+                    "frames/frame_%05d.png"
+                ]
+                result = subprocess.run(ffmpeg_cmd, capture_output=True, text=True)
+                if result.returncode != 0:
+                    self.log(f"❌ Помилка витягування кадрів:\n{result.stderr}")
+                    self.done_signal.emit(False)
+                    return
 
-            
-            frame_count = len([f for f in os.listdir("frames") if f.endswith('.png')])
-            if frame_count == 0:
-                self.log("❌ Не вдалося витягти кадри з відео")
-                self.done_signal.emit(False)
-                return
-            self.log(f"[i] Витягнуто кадрів: {frame_count}")
+                
+                frame_count = len([f for f in os.listdir("frames") if f.endswith('.png')])
+                if frame_count == 0:
+                    self.log("❌ Не вдалося витягти кадри з відео")
+                    self.done_signal.emit(False)
+                    return
+                self.log(f"[i] Витягнуто кадрів: {frame_count}")
 
             
             venv_python = os.path.join("Real-ESRGAN", ".venv", "Scripts", "python.exe")
@@ -206,6 +283,8 @@ class UpscaleThread(QThread):
                 venv_python = os.path.join("Real-ESRGAN", ".venv", "bin", "python")
 
             realesrgan_script = os.path.join("Real-ESRGAN", "inference_realesrgan.py")
+            engine_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "engine.py")
+            pipeline_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pipeline.py")
 
             if not os.path.exists(venv_python) or not os.path.exists(realesrgan_script):
                 self.log("❌ Не знайдено середовище .venv або скрипт inference_realesrgan.py")
@@ -235,8 +314,85 @@ class UpscaleThread(QThread):
 
             base_scale = min(int(s.replace('x', '')) for s in model_categories[self.category][self.model_name].keys())
             target_scale_int = int(self.scale.replace("x", ""))
+            
+            times = 1
+            if target_scale_int != base_scale:
+                times = round(math.log(target_scale_int, base_scale))
+                if base_scale ** times != target_scale_int:
+                    self.log(f"❌ Неможливо досягти x{target_scale_int} з базовою x{base_scale}")
+                    self.done_signal.emit(False)
+                    return
 
             
+            if self.streaming:
+                self.log("[✔] Потоковий конвеєр: декодер -> воркери -> енкодер...")
+                cmd = [
+                    venv_python, pipeline_script,
+                    "-i", self.video_path,
+                    "-n", self.model_name,
+                    "--mode", self.mode,
+                    "--passes", str(times),
+                    "--scale", str(target_scale_int),
+                    "--width", str(width),
+                    "--height", str(height),
+                    "--fps", str(fps),
+                    "--frames", str(total_frames),
+                    "--output-name", self.output_name,
+                    "--profiles", *self.profiles,
+                ]
+                if has_audio and os.path.exists(audio_path):
+                    cmd.extend(["--audio", audio_path])
+                if self.progressive:
+                    cmd.append("--fragmented")
+                if not self.run_logged(cmd):
+                    self.log("❌ Помилка потокового конвеєра")
+                    self.done_signal.emit(False)
+                    return
+                _, output_paths = build_encode_cmd([], self.profiles, self.output_name)
+                self.finish_job(output_paths, has_audio, audio_path)
+                return
+
+            
+            strips = target_scale_int >= STRIP_MIN_SCALE and not self.workers
+            if strips:
+                self.log(f"[i] x{target_scale_int}: останній прохід смугами одразу в енкодер, кеш кадрів не використовується")
+
+            backend = f"realesrgan-{self.mode}" + ("-batch" if self.batch else "")
+            if self.workers:
+                coordinator = Coordinator(self.workers, log=self.log)
+                remote_weights = coordinator.weights_checksum(self.model_name)
+                if remote_weights is None:
+                    self.done_signal.emit(False)
+                    return
+                backend = f"distributed-{self.mode}-{remote_weights}"
+
+            cache = None
+            cached = {}
+            all_frames = sorted(f for f in os.listdir("frames") if f.endswith('.png'))
+            frame_keys = {f: None for f in all_frames}
+            if not strips:
+                self.log("[✔] Перевірка кешу кадрів...")
+                cache = FrameCache(model_path, self.scale, backend)
+                for f in all_frames:
+                    if self.stop_requested:
+                        self.log("[!] Операція перервана користувачем")
+                        self.done_signal.emit(False)
+                        return
+                    fp = os.path.join("frames", f)
+                    key = cache.key(fp)
+                    hit = cache.lookup(key)
+                    if hit:
+                        cached[f] = hit
+                        del frame_keys[f]
+                        os.remove(fp)
+                    else:
+                        frame_keys[f] = key
+                self.log(f"[i] Знайдено в кеші: {len(cached)}/{frame_count}, до апскейлу: {len(frame_keys)}")
+
+            
+            def encoder_failed():
+                return encoder is not None and encoder.failed()
+
             def run_upscale(model_file, in_folder, out_folder):
                 self.log(f"[✔] Апскейл кадрів: {model_file}...")
                 frames = [f for f in os.listdir(in_folder) if f.endswith('.png')]
@@ -248,146 +404,154 @@ class UpscaleThread(QThread):
                 
                 cmd = [
                     venv_python,
-                    realesrgan_script,
+                    engine_script if self.batch else realesrgan_script,
                     "-i", in_folder,
                     "-o", out_folder,
                     "-n", model_file.replace(".pth", ""),
-                    "--tile", "0"  
                 ]
+                if self.batch:
+                    cmd.extend(["--mode", self.mode])
+                else:
+                    cmd.extend(inference_modes[self.mode])
 
-                process = subprocess.Popen(
-                    cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    text=True,
-                    bufsize=1,
-                    universal_newlines=True
-                )
-
-                
-                processed = 0
-                progress_pattern = re.compile(r'Processing.*?(\d+)/(\d+)')
-                start_time = time.time()
-
-                while True:
-                    if self.stop_requested:
-                        process.terminate()
-                        self.log("[!] Апскейл перервано")
-                        return False
-
-                    line = process.stdout.readline()
-                    if not line:
-                        break
-
-                    line = line.strip()
-                    self.log(line)
-
-                
-                    match = progress_pattern.search(line)
-                    if match:
-                        current = int(match.group(1))
-                        total_frames = int(match.group(2))
-                        self.progress_signal.emit(current, total_frames)
-                        processed = current
-                    else:
-                
-                        elapsed = time.time() - start_time
-                        if elapsed > 0 and processed > 0:
-                            fps = processed / elapsed
-                            remaining = (total - processed) / fps if fps > 0 else 0
-                            mins, secs = divmod(int(remaining), 60)
-                            self.log(
-                                f"[i] Прогрес: {processed}/{total} (~{fps:.1f} кадр/сек) Залишилось: {mins}хв {secs}с")
-
-                process.wait()
-                if process.returncode != 0:
-                    self.log(f"❌ Помилка апскейлу (код {process.returncode})")
+                if not self.run_logged(cmd, abort=encoder_failed):
+                    if not self.stop_requested and not encoder_failed():
+                        self.log("❌ Помилка апскейлу")
                     return False
 
                 return True
 
+
             
-            if target_scale_int == base_scale:
-                if not run_upscale(model_file_name, "frames", "upscaled"):
+            if self.progressive and not strips:
+                frame_paths = [
+                    cached.get(f, os.path.join("upscaled", f.replace(".png", "_out.png")))
+                    for f in all_frames
+                ]
+                encoder = ProgressiveEncoder(
+                    fps,
+                    self.profiles,
+                    self.output_name,
+                    frame_paths,
+                    audio_path if has_audio and os.path.exists(audio_path) else None
+                )
+                encoder.start()
+                self.log(f"[i] Прогресивний запис: {', '.join(encoder.output_paths)}")
+
+            
+            if not frame_keys:
+                self.log("[i] Усі кадри взято з кешу, апскейл пропущено")
+                times = 0
+
+            if times and self.workers:
+                self.log(f"[✔] Розподілений апскейл на {len(self.workers)} воркерах...")
+                ok = coordinator.run(
+                    "frames", "upscaled", list(frame_keys.keys()),
+                    self.model_name, self.mode, times,
+                    progress=self.progress_signal.emit,
+                    stop=lambda: self.stop_requested or encoder_failed()
+                )
+                if not ok or encoder_failed():
+                    if encoder_failed():
+                        self.log(f"❌ Прогресивний енкодер зупинився:\n{encoder.error_output()}")
+                    else:
+                        self.log("❌ Помилка розподіленого апскейлу")
+                    if encoder:
+                        encoder.abort()
                     self.done_signal.emit(False)
                     return
-            else:
-                times = round(math.log(target_scale_int, base_scale))
-                if base_scale ** times != target_scale_int:
-                    self.log(f"❌ Неможливо досягти x{target_scale_int} з базовою x{base_scale}")
+                times = 0
+
+            in_folder = "frames"
+            for i in range(times):
+                out_folder = "upscaled" if i == times - 1 else f"pass_{i + 1}"
+                if strips and i == times - 1:
+                    self.log(f"[✔] Смуговий апскейл і кодування: {model_file_name}...")
+                    cmd = [
+                        venv_python, engine_script,
+                        "-i", in_folder,
+                        "-n", model_file_name.replace(".pth", ""),
+                        "--mode", self.mode,
+                        "--strips",
+                        "--fps", str(fps),
+                        "--output-name", self.output_name,
+                        "--profiles", *self.profiles,
+                    ]
+                    if has_audio and os.path.exists(audio_path):
+                        cmd.extend(["--audio", audio_path])
+                    if self.progressive:
+                        cmd.append("--fragmented")
+                    ok = self.run_logged(cmd)
+                else:
+                    os.makedirs(out_folder, exist_ok=True)
+                    ok = run_upscale(model_file_name, in_folder, out_folder)
+                if in_folder != "frames":
+                    shutil.rmtree(in_folder, ignore_errors=True)
+                if encoder_failed():
+                    # між проходами: енкодер, що впав на старті, зупиняє роботу одразу
+                    self.log(f"❌ Прогресивний енкодер зупинився:\n{encoder.error_output()}")
+                    ok = False
+                if not ok:
+                    if encoder:
+                        encoder.abort()
                     self.done_signal.emit(False)
                     return
 
-                for i in range(times):
-                    in_folder = "frames" if i == 0 else "upscaled"
-                    if not run_upscale(model_file_name, in_folder, "upscaled"):
-                        self.done_signal.emit(False)
-                        return
+                
+                if out_folder != "upscaled":
+                    for f in os.listdir(out_folder):
+                        if f.endswith("_out.png"):
+                            os.rename(os.path.join(out_folder, f),
+                                      os.path.join(out_folder, f.replace("_out.png", ".png")))
+                in_folder = out_folder
 
             
-            self.log("[✔] Збирання відео...")
-            output_path = f"res/{self.output_name}.mp4"
+            if cache:
+                for f, key in frame_keys.items():
+                    out_fp = os.path.join("upscaled", f.replace(".png", "_out.png"))
+                    if os.path.isfile(out_fp):
+                        cache.store(key, out_fp)
 
             
-            ffmpeg_cmd = [
-                "ffmpeg", "-y",
-                "-framerate", str(fps),
-                "-i", "upscaled/frame_%05d_out.png",
-                "-c:v", "libx264",
-                "-preset", "slow",
-                "-crf", "18",
-                "-pix_fmt", "yuv420p",
-            ]
-
-        
-            if has_audio and os.path.exists(audio_path):
-                ffmpeg_cmd.extend(["-i", audio_path, "-c:a", "copy"])
-                ffmpeg_cmd.append("-map")
-                ffmpeg_cmd.append("0:v")
-                ffmpeg_cmd.append("-map")
-                ffmpeg_cmd.append("1:a")
-                ffmpeg_cmd.append("-shortest")  
+            if encoder:
+                self.log("[✔] Завершення прогресивного запису...")
+                success = encoder.finish()
+                output_paths = encoder.output_paths
+                encoder_error = encoder.error_output()
+                encoder = None
+                if not success:
+                    self.log(f"❌ Помилка при створенні відео:\n{encoder_error}")
+                    self.done_signal.emit(False)
+                    return
+            elif strips:
+                _, output_paths = build_encode_cmd([], self.profiles, self.output_name)
             else:
-                ffmpeg_cmd.append("-an")  
-
-            ffmpeg_cmd.append(output_path)
-
-            result = subprocess.run(ffmpeg_cmd, capture_output=True, text=True)
-            if result.returncode != 0:
-                self.log(f"❌ Помилка при створенні відео:\n{result.stderr}")
-                self.done_signal.emit(False)
-                return
+                for f, hit in cached.items():
+                    shutil.copyfile(hit, os.path.join("upscaled", f.replace(".png", "_out.png")))
+
+                self.log(f"[✔] Збирання відео: {', '.join(self.profiles)}...")
+                ffmpeg_cmd, output_paths = build_encode_cmd(
+                    ["-framerate", str(fps), "-i", "upscaled/frame_%05d_out.png"],
+                    self.profiles,
+                    self.output_name,
+                    audio_path if has_audio and os.path.exists(audio_path) else None
+                )
 
-            
-            if has_audio and os.path.exists(audio_path):
-                try:
-                    os.remove(audio_path)
-                    self.log("[i] Тимчасовий аудіо файл видалено")
-                except Exception as e:
-                    self.log(f"⚠️ Не вдалося видалити тимчасовий аудіо файл: {str(e)}")
+                result = subprocess.run(ffmpeg_cmd, capture_output=True, text=True)
+                if result.returncode != 0:
+                    self.log(f"❌ Помилка при створенні відео:\n{result.stderr}")
+                    self.done_signal.emit(False)
+                    return
 
-        
-            self.log("[i] Очистка тимчасових файлів...")
-            for folder in ["frames", "upscaled"]:
-                for f in os.listdir(folder):
-                    if self.stop_requested:
-                        break
-                    fp = os.path.join(folder, f)
-                    if os.path.isfile(fp):
-                        try:
-                            os.remove(fp)
-                        except:
-                            pass
+            if cache:
+                removed, cache_size = cache.evict()
+                self.log(f"[i] Кеш: {cache_size / 1024 ** 3:.2f} ГБ, видалено старих кадрів: {removed}")
 
-            self.log(f"[✔] Готово! Відео збережено як: {output_path}")
-            if has_audio:
-                self.log("[i] Відео містить оригінальний звук")
-            else:
-                self.log("[i] Відео без звуку (оригінал не містив аудіо)")
-
-            self.done_signal.emit(True)
+            self.finish_job(output_paths, has_audio, audio_path)
 
         except Exception as e:
+            if encoder:
+                encoder.abort()
             import traceback
             self.log(f"❌ Критична помилка:\n{str(e)}\n{traceback.format_exc()}")
             self.done_signal.emit(False)
@@ -518,6 +682,49 @@ class MainWindow(QWidget):
         self.layout.addWidget(self.model_groupbox)
 
         
+        self.profile_groupbox = QGroupBox("Вихідні формати")
+        profile_layout = QHBoxLayout()
+        profile_layout.setSpacing(8)
+        self.profile_buttons = {}
+        for name in output_profiles.keys():
+            btn = QPushButton(name)
+            btn.setCheckable(True)
+            btn.setChecked(name in DEFAULT_PROFILES)
+            btn.setMinimumHeight(30)
+            self.profile_buttons[name] = btn
+            profile_layout.addWidget(btn)
+        self.btn_progressive = QPushButton("Прогресивний MP4")
+        self.btn_progressive.setCheckable(True)
+        self.btn_progressive.setMinimumHeight(30)
+        profile_layout.addWidget(self.btn_progressive)
+        self.profile_groupbox.setLayout(profile_layout)
+        self.layout.addWidget(self.profile_groupbox)
+
+        
+        self.mode_groupbox = QGroupBox("Режим інференсу")
+        mode_layout = QHBoxLayout()
+        mode_layout.setSpacing(8)
+        self.mode_buttons = {}
+        for name in inference_modes.keys():
+            btn = QPushButton(name)
+            btn.setCheckable(True)
+            btn.setChecked(name == DEFAULT_MODE)
+            btn.setMinimumHeight(30)
+            btn.clicked.connect(self.mode_selected)
+            self.mode_buttons[name] = btn
+            mode_layout.addWidget(btn)
+        self.btn_batch = QPushButton("Батчинг кадрів")
+        self.btn_batch.setCheckable(True)
+        self.btn_batch.setMinimumHeight(30)
+        mode_layout.addWidget(self.btn_batch)
+        self.btn_streaming = QPushButton("Потоковий конвеєр")
+        self.btn_streaming.setCheckable(True)
+        self.btn_streaming.setMinimumHeight(30)
+        mode_layout.addWidget(self.btn_streaming)
+        self.mode_groupbox.setLayout(mode_layout)
+        self.layout.addWidget(self.mode_groupbox)
+
+        
         output_layout = QHBoxLayout()
         output_layout.setSpacing(10)
         output_label = QLabel("Ім'я вихідного файлу:")
@@ -528,6 +735,16 @@ class MainWindow(QWidget):
         self.layout.addLayout(output_layout)
 
         
+        workers_layout = QHBoxLayout()
+        workers_layout.setSpacing(10)
+        workers_label = QLabel("Воркери:")
+        self.workers_edit = QLineEdit()
+        self.workers_edit.setPlaceholderText("host:port, host:port (порожньо - локально)")
+        workers_layout.addWidget(workers_label)
+        workers_layout.addWidget(self.workers_edit)
+        self.layout.addLayout(workers_layout)
+
+        
         self.log = QTextEdit()
         self.log.setMinimumHeight(200)
         self.layout.addWidget(self.log)
@@ -603,6 +820,12 @@ class MainWindow(QWidget):
             except Exception as e:
                 self.log.append(f"[!] Помилка аналізу: {str(e)}")
 
+    def mode_selected(self):
+        sender = self.sender()
+        for btn in self.mode_buttons.values():
+            btn.setChecked(btn == sender)
+        self.log.append(f"[✔] Режим інференсу: {sender.text()}")
+
     def start_upscale(self):
         if not hasattr(self, 'video_path') or not self.video_path:
             QMessageBox.warning(self, "Помилка", "Відео не вибрано!")
@@ -618,6 +841,17 @@ class MainWindow(QWidget):
             output_name = f"{base_name}_{self.selected_model}_{self.selected_scale}"
             self.output_edit.setText(output_name)
 
+        profiles = [name for name, btn in self.profile_buttons.items() if btn.isChecked()]
+        mode = next(name for name, btn in self.mode_buttons.items() if btn.isChecked())
+        try:
+            workers = parse_workers(self.workers_edit.text())
+        except ValueError:
+            QMessageBox.warning(self, "Помилка", "Неправильний список воркерів!")
+            return
+        if not profiles:
+            QMessageBox.warning(self, "Помилка", "Оберіть хоча б один вихідний формат!")
+            return
+
         
         self.btn_start.setEnabled(False)
         self.btn_stop.setEnabled(True)
@@ -629,7 +863,13 @@ class MainWindow(QWidget):
             output_name,
             self.selected_category,
             self.selected_model,
-            self.selected_scale
+            self.selected_scale,
+            profiles,
+            mode,
+            self.btn_progressive.isChecked(),
+            workers,
+            self.btn_batch.isChecked(),
+            self.btn_streaming.isChecked()
         )
         self.upscale_thread.log_signal.connect(self.log.append)
         self.upscale_thread.progress_signal.connect(self.show_progress)
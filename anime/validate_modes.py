@@ -0,0 +1,155 @@
+import os
+import sys
+import time
+import argparse
+
+import cv2
+import numpy as np
+
+from models import model_categories, inference_modes, REFERENCE_MODE, base_model_file
+from engine import Engine, mode_options, MIN_STRIP_ROWS
+
+# fp16 проти fp32 розходиться лише округленням: кілька рівнів з 255 на окремих пікселях,
+# PSNR понад 40 дБ. Пороги лишають запас під це і не більше: тайлові режими з tile_pad 10
+# дають шви на стиках тайлів і мають падати тут видимо, а не ховатись за широким допуском
+MIN_PSNR = 35.0
+MIN_SSIM = 0.97
+MAX_PIXEL_ERROR = 8
+BATCH_SUFFIX = "+batch"
+STRIPS_SUFFIX = "+strips"
+
+
+def psnr(a, b):
+    mse = np.mean((a.astype(np.float64) - b.astype(np.float64)) ** 2)
+    if mse == 0:
+        return float("inf")
+    return 10 * np.log10(255.0 ** 2 / mse)
+
+
+def ssim(a, b):
+    a = cv2.cvtColor(a, cv2.COLOR_BGR2GRAY).astype(np.float64)
+    b = cv2.cvtColor(b, cv2.COLOR_BGR2GRAY).astype(np.float64)
+    c1 = (0.01 * 255) ** 2
+    c2 = (0.03 * 255) ** 2
+
+    mu_a = cv2.GaussianBlur(a, (11, 11), 1.5)
+    mu_b = cv2.GaussianBlur(b, (11, 11), 1.5)
+    var_a = cv2.GaussianBlur(a * a, (11, 11), 1.5) - mu_a ** 2
+    var_b = cv2.GaussianBlur(b * b, (11, 11), 1.5) - mu_b ** 2
+    cov = cv2.GaussianBlur(a * b, (11, 11), 1.5) - mu_a * mu_b
+
+    ssim_map = ((2 * mu_a * mu_b + c1) * (2 * cov + c2)) / ((mu_a ** 2 + mu_b ** 2 + c1) * (var_a + var_b + c2))
+    return float(ssim_map.mean())
+
+
+def run_mode(engine, model_name, mode, imgs):
+    if mode.endswith(BATCH_SUFFIX):
+        # кадри батчами через Engine.upscale_batch, як у режимі "Батчинг кадрів"
+        base_mode = mode[:-len(BATCH_SUFFIX)]
+        engine.upscale_batch(imgs[:1], model_name, base_mode)
+        start = time.time()
+        outs = engine.upscale_batch(imgs, model_name, base_mode)
+        return outs, time.time() - start
+
+    if mode.endswith(STRIPS_SUFFIX):
+        # смугова збірка x8/x16: чотири смуги на кадр, щоб стики STRIP_PAD потрапили в порівняння
+        base_mode = mode[:-len(STRIPS_SUFFIX)]
+        rows = max(MIN_STRIP_ROWS, imgs[0].shape[0] // 4)
+
+        def strips(img):
+            return np.concatenate(list(engine.upscale_strips(img, model_name, base_mode, rows)))
+
+        strips(imgs[0])
+        start = time.time()
+        outs = [strips(img) for img in imgs]
+        return outs, time.time() - start
+
+    upsampler, netscale = engine.get(model_name, mode)
+
+    # прогрів: завантаження ваг і перший прохід не входять у заміряний час
+    upsampler.enhance(imgs[0], outscale=netscale)
+
+    start = time.time()
+    outs = [upsampler.enhance(img, outscale=netscale)[0] for img in imgs]
+    return outs, time.time() - start
+
+
+def compare_frames(refs, cands):
+    worst_psnr = float("inf")
+    worst_ssim = 1.0
+    max_error = 0
+    for ref, cand in zip(refs, cands):
+        if cand is None or cand.shape != ref.shape:
+            return None
+        worst_psnr = min(worst_psnr, psnr(ref, cand))
+        worst_ssim = min(worst_ssim, ssim(ref, cand))
+        max_error = max(max_error, int(np.abs(ref.astype(np.int16) - cand.astype(np.int16)).max()))
+    return worst_psnr, worst_ssim, max_error
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Перевірка якості швидких режимів проти еталонного")
+    parser.add_argument("-i", "--frames", default="samples", help="Папка з тестовими кадрами")
+    parser.add_argument("--reference", default=REFERENCE_MODE, choices=inference_modes.keys())
+    candidates = list(inference_modes.keys()) + [m + BATCH_SUFFIX for m in inference_modes.keys() if mode_options(m)[0] == 0]
+    candidates += [m + STRIPS_SUFFIX for m in inference_modes.keys()]
+    parser.add_argument("--candidates", nargs="+", choices=candidates,
+                        default=[m for m in candidates if m != REFERENCE_MODE])
+    parser.add_argument("--min-psnr", type=float, default=MIN_PSNR)
+    parser.add_argument("--min-ssim", type=float, default=MIN_SSIM)
+    parser.add_argument("--max-error", type=int, default=MAX_PIXEL_ERROR)
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.frames) or not any(f.endswith(".png") for f in os.listdir(args.frames)):
+        print(f"❌ Не знайдено кадрів у папці: {args.frames}")
+        return 1
+    imgs = [cv2.imread(os.path.join(args.frames, f), cv2.IMREAD_COLOR)
+            for f in sorted(os.listdir(args.frames)) if f.endswith(".png")]
+
+    failed = False
+    for category, models in model_categories.items():
+        for model_name in models.keys():
+            model_file = base_model_file(category, model_name)
+            print(f"\n[✔] {category} / {model_name} ({model_file})")
+
+            # окремий Engine на модель, щоб не тримати в пам'яті всі мережі одразу
+            engine = Engine()
+            net_name = model_file.replace(".pth", "")
+            try:
+                refs, ref_time = run_mode(engine, net_name, args.reference, imgs)
+            except Exception as e:
+                print(f"❌ Помилка апскейлу ({args.reference}): {e}")
+                failed = True
+                continue
+            print(f"[i] {args.reference}: {ref_time:.2f} сек (еталон, без завантаження моделі)")
+
+            for mode in args.candidates:
+                try:
+                    cands, cand_time = run_mode(engine, net_name, mode, imgs)
+                except Exception as e:
+                    print(f"❌ Помилка апскейлу ({mode}): {e}")
+                    failed = True
+                    continue
+
+                metrics = compare_frames(refs, cands)
+                if metrics is None:
+                    print(f"❌ {mode}: кадри не збігаються з еталоном за розміром")
+                    failed = True
+                    continue
+
+                worst_psnr, worst_ssim, max_error = metrics
+                ok = worst_psnr >= args.min_psnr and worst_ssim >= args.min_ssim and max_error <= args.max_error
+                status = "[✔]" if ok else "❌"
+                print(f"{status} {mode}: PSNR {worst_psnr:.2f} дБ, SSIM {worst_ssim:.4f}, "
+                      f"макс. похибка {max_error}, прискорення x{ref_time / cand_time:.2f}")
+                failed = failed or not ok
+
+    if failed:
+        print("\n❌ Деякі режими не пройшли пороги якості")
+        return 1
+    print("\n[✔] Усі режими в межах порогів якості")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())